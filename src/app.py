@@ -1,20 +1,47 @@
+import asyncio
 import config
+import logging
 import os
 import streamlit as st
+import threading
+import time
 import utils
 
+from collections.abc import AsyncIterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from db import ChatDB, ChatExistsError
-from ollama import ChatResponse, Client as OllamaClient
-from streamlit.connections import SQLConnection
+from ollama import AsyncClient as AsyncOllamaClient, ChatResponse, Client as OllamaClient
 
 
 # Ensure data directory exists for storing the SQLite database and other files
 os.makedirs("data", exist_ok=True)
 
 
-# Configure logging
-# Streamlit's logging doesn't seem to work as expected; a custom one will be established for now.
-log = utils.logger()
+@st.cache_resource(show_spinner=False)
+def _init_runtime() -> tuple[logging.Logger, OllamaClient | None]:
+    """
+    Configure logging and create the Ollama client once per process.
+    Cached so reruns reuse the same logger and the client's HTTP connection pool.
+
+    :return: Tuple of the configured logger and the Ollama client (None if it failed to initialize).
+    """
+    # Streamlit's logging doesn't seem to work as expected; a custom one will be established for now.
+    runtime_log: logging.Logger = utils.logger()
+
+    # Optional: decode streamed Ollama responses with orjson when it is installed
+    if utils.use_orjson():
+        runtime_log.info("Using orjson to decode Ollama responses.")
+
+    # Initialize Ollama Client connection to the specified host
+    try:
+        return runtime_log, OllamaClient(host=config.STREAMLIT_OLLAMA_HOST, **utils.http_client_options())
+    except Exception as e:
+        runtime_log.error("Failed to initialize Ollama Client API for host %s. Error: %s", config.STREAMLIT_OLLAMA_HOST, e)
+        return runtime_log, None
+
+
+# Configure logging and the Ollama client
+log, ollama = _init_runtime()
 
 
 # Streamlit page configuration
@@ -26,23 +53,25 @@ st.set_page_config(
 )
 
 
+@st.cache_resource(show_spinner=False)
+def _init_chat_db() -> ChatDB:
+    """
+    Create the ChatDB instance once per process.
+    Cached so reruns do not repeat the schema setup against the database.
+
+    :return: The shared ChatDB instance.
+    """
+    return ChatDB.from_streamlit(name="streamlit_ollama_db")
+
+
 # Initialize ChatDB instance
 # This will manage chat history persistence
 try:
-    connection: SQLConnection = st.connection(name="streamlit_ollama_db", type="sql")
-    chat_db: ChatDB = ChatDB(connection=connection)
+    chat_db: ChatDB = _init_chat_db()
 except Exception as e:
-    log.error(f"Failed to initialize ChatDB. Error: {e}")
+    log.error("Failed to initialize ChatDB. Error: %s", e)
     st.error("Failed to initialize chat database; chat history will not be saved.")
-    connection = chat_db = None
-
-
-# Initialize Ollama Client connection to the specified host
-try:
-    ollama = OllamaClient(host=config.STREAMLIT_OLLAMA_HOST)
-except Exception as e:
-    log.error(f"Failed to initialize Ollama Client API for host {config.STREAMLIT_OLLAMA_HOST}. Error: {e}")
-    ollama = None
+    chat_db = None
 
 
 # Initialize session state variables on first run
@@ -52,6 +81,30 @@ if "chat_id" not in st.session_state:
 if "messages" not in st.session_state:
     st.session_state["messages"] = []
 
+# ID to page older messages of a partially loaded saved chat from (None once the full history is loaded)
+if "older_messages_before_id" not in st.session_state:
+    st.session_state["older_messages_before_id"] = None
+
+
+@st.cache_data(show_spinner=False)
+def _list_saved_chats(_chat_db: ChatDB, limit: int | None) -> list[tuple]:
+    """
+    Cached wrapper around ChatDB.list_chats() so the sidebar does not query the database on every rerun.
+    Cleared with _clear_chat_caches() whenever chats are saved, deleted or updated.
+
+    :param _chat_db: The shared ChatDB instance (not hashed by the cache).
+    :param limit: Maximum number of the most recent chats to list; None or 0 lists all chats.
+    :return: List of tuples with chat metadata (id, name, model, timestamp).
+    """
+    return _chat_db.list_chats(limit=limit)
+
+
+def _clear_chat_caches() -> None:
+    """
+    Invalidate the cached saved chats list after the chats table changes.
+    """
+    _list_saved_chats.clear()
+
 
 @st.dialog("Save your chat", width="medium")
 def save_chat() -> None:
@@ -65,6 +118,7 @@ def save_chat() -> None:
                                              model=st.session_state["selected_model"], 
                                              messages=st.session_state["messages"])
             st.session_state["chat_id"] = chat_id
+            _clear_chat_caches()
             st.success("Chat saved!")
         except ChatExistsError as e:
             st.error(str(e))
@@ -81,19 +135,100 @@ def delete_chat(chat_id: int) -> None:
     """
     if st.button("Delete", width="stretch", type="primary"):
         chat_db.delete_chat(chat_id=chat_id)
+        _clear_chat_caches()
         st.session_state["messages"] = []
         st.session_state["chat_id"] = None
+        st.session_state["older_messages_before_id"] = None
         st.rerun()
 
 
-def update_chat_model() -> None:
+def update_chat_model(model: str) -> None:
     """
     Update the model used for the current chat in the database.
     Is called when the model selection changes in the sidebar.
+
+    :param model: The newly selected model.
     """
     if st.session_state["chat_id"]:
         chat_db.update_chat_model(chat_id=st.session_state["chat_id"],
-                                  model=st.session_state["selected_model"])
+                                  model=model)
+        _clear_chat_caches()
+
+
+async def fan_out(host: str, jobs: list[dict]) -> list[ChatResponse | BaseException]:
+    """
+    Run several non-streaming chat requests against the Ollama host concurrently.
+    How many actually run in parallel is bounded by the server's OLLAMA_NUM_PARALLEL setting.
+
+    :param host: The Ollama host URL.
+    :param jobs: List of keyword argument dicts for AsyncClient.chat (model, messages, etc.).
+    :return: List of chat responses (or the raised exception) in the same order as the jobs.
+    """
+    # AsyncClient is not an async context manager, so its HTTP connection pool is closed explicitly
+    async_ollama = AsyncOllamaClient(host=host, **utils.http_client_options())
+    try:
+        return await asyncio.gather(*(async_ollama.chat(**job) for job in jobs), return_exceptions=True)
+    finally:
+        await async_ollama._client.aclose()
+
+
+def parallel_chat(jobs: list[dict]) -> list[ChatResponse | BaseException]:
+    """
+    Synchronous wrapper around fan_out() for use in the Streamlit script.
+
+    :param jobs: List of keyword argument dicts for AsyncClient.chat (model, messages, etc.).
+    :return: List of chat responses (or the raised exception) in the same order as the jobs.
+    """
+    return asyncio.run(fan_out(host=config.STREAMLIT_OLLAMA_HOST, jobs=jobs))
+
+
+@st.cache_resource(show_spinner=False)
+def _compare_executor() -> ThreadPoolExecutor:
+    """
+    Create the thread pool that runs comparison requests once per process.
+    parallel_chat() is submitted to it so the comparisons run alongside the main response stream.
+
+    :return: The shared thread pool.
+    """
+    return ThreadPoolExecutor(thread_name_prefix="model-compare")
+
+
+def _list_models(ollama_client: OllamaClient) -> tuple[tuple[str, ...], dict[str, int]]:
+    """
+    Fetch the sorted model names available on the Ollama host.
+
+    :param ollama_client: The Ollama client to query.
+    :return: Tuple of the sorted model names (as an immutable tuple) and a name-to-position lookup for them.
+    """
+    models: tuple[str, ...] = tuple(sorted(m.model for m in ollama_client.list().models))
+    return models, {name: i for i, name in enumerate(models)}
+
+
+@st.cache_resource(show_spinner=False)
+def _model_poller(_ollama: OllamaClient, host: str) -> dict:
+    """
+    Keep the model list fresh from a background thread so sidebar reruns never wait on Ollama.
+    The list is fetched once up front, then refreshed every STREAMLIT_OLLAMA_MODEL_REFRESH_SECONDS.
+
+    :param _ollama: The shared Ollama client (not hashed by the cache).
+    :param host: The Ollama host URL, used as the cache key.
+    :return: Shared state dict with the latest "models" result and the "lock" guarding it.
+    """
+    state: dict = {"models": _list_models(_ollama), "lock": threading.Lock()}
+
+    def refresh_models() -> None:
+        while True:
+            time.sleep(config.STREAMLIT_OLLAMA_MODEL_REFRESH_SECONDS)
+            try:
+                models = _list_models(_ollama)
+            except Exception as e:
+                log.warning("Failed to refresh the model list from %s. Error: %s", host, e)
+                continue
+            with state["lock"]:
+                state["models"] = models
+
+    threading.Thread(target=refresh_models, name="model-poller", daemon=True).start()
+    return state
 
 
 with st.sidebar:
@@ -106,38 +241,59 @@ with st.sidebar:
         if st.button('New Chat', width="stretch"):
             st.session_state["messages"] = []
             st.session_state["chat_id"] = None
+            st.session_state["older_messages_before_id"] = None
             st.rerun()
 
     # Fetch available models from Ollama server
     if ollama is None:
         st.error("Ollama client unavailable; model list unavailable.")
-        models = []
+        models, model_index = (), {}
     else:
-        list_models = ollama.list()
-        models = sorted([m.model for m in list_models.models])
+        model_poller: dict = _model_poller(ollama, config.STREAMLIT_OLLAMA_HOST)
+
+        # Refresh Models button
+        # Fetches the model list right away instead of waiting for the next background refresh
+        if st.button("Refresh Models", width="stretch"):
+            try:
+                refreshed_models = _list_models(ollama)
+                with model_poller["lock"]:
+                    model_poller["models"] = refreshed_models
+            except Exception as e:
+                log.error("Failed to refresh the model list. Error: %s", e)
+                st.error("Failed to refresh the model list — check logs.")
+
+        with model_poller["lock"]:
+            models, model_index = model_poller["models"]
     
+    # Fetch saved chats (newest first) for the model default below and the Saved Chats list
+    saved_chats = _list_saved_chats(chat_db, config.STREAMLIT_OLLAMA_SAVED_CHATS_LIMIT)
+
     # Determine default model selection
-    # Check for last used model from chat history
+    # Check for last used model from chat history, i.e. the model of the newest saved chat
+    # Fallback to the first model in the list if the model is no longer available
     if st.session_state.get("selected_model", None) is None:
-        last_used_model: str = chat_db.last_used_model()
-
-        if last_used_model and last_used_model in models:
-            st.session_state['selected_model_index'] = models.index(last_used_model)
-        else:
-            st.session_state['selected_model_index'] = 0  # Fallback to the first model in the list
+        last_used_model: str | None = saved_chats[0][2] if saved_chats else None
+        st.session_state['selected_model_index'] = model_index.get(last_used_model, 0)
     else:
-        if st.session_state["selected_model"] in models:
-            st.session_state['selected_model_index'] = models.index(st.session_state["selected_model"])
-        else:
-            st.session_state['selected_model_index'] = 0  # Fallback to the first model in the list
+        st.session_state['selected_model_index'] = model_index.get(st.session_state["selected_model"], 0)
 
     # Model selection dropdown
-    st.session_state["selected_model"] = st.selectbox('Select a model', 
-                                                      options=models, 
-                                                      index=st.session_state['selected_model_index'],
-                                                      on_change=update_chat_model)
-    st.session_state['selected_model_index'] = models.index(st.session_state["selected_model"])
-    log.debug(f'Current model selected: {st.session_state["selected_model"]}, index: {st.session_state["selected_model_index"]}')
+    # A change is compared against the previous selection here rather than in an on_change callback,
+    # since the callback would run before the new value is assigned to the session state
+    # Switches away from a model that is no longer available (e.g. a loaded chat's) are not written to the database
+    selected_model: str | None = st.selectbox('Select a model', 
+                                              options=models, 
+                                              index=st.session_state['selected_model_index'])
+    previous_model: str | None = st.session_state.get("selected_model", None)
+    if selected_model != previous_model and previous_model in model_index:
+        update_chat_model(model=selected_model)
+    st.session_state["selected_model"] = selected_model
+    log.debug("Current model selected: %s, index: %s", st.session_state["selected_model"], st.session_state["selected_model_index"])
+
+    # Comparison models
+    # Each prompt is also sent to these models concurrently; their responses are shown for the current turn only
+    # The selected model is skipped if chosen here as well
+    st.multiselect('Compare with', options=models, key="compare_models")
 
     # Save Chat / Delete Chat buttons
     if st.session_state["chat_id"] is None and len(st.session_state["messages"]) > 0:
@@ -147,23 +303,44 @@ with st.sidebar:
         if st.button("Delete Chat", width="stretch", type="primary"):
             delete_chat(chat_id=st.session_state["chat_id"])
 
-    # Display saved chats as buttons
-    # Clicking a button loads that chat's messages into the main chat area
+    # Display saved chats in a single selectbox
+    # Choosing a chat loads its messages into the main chat area
     with st.container():
         st.markdown("### Saved Chats")
-        saved_chats = chat_db.list_chats()
 
         if not saved_chats:
             st.info("You have no saved chats.")
         else:
-            for chat in saved_chats:
-                chat_id, chat_name, chat_model, chat_timestamp = chat
-                if st.button(f"{chat_name}\n ({chat_model})", key=f"chat_{chat_id}", width="stretch"):
-                    # Load chat messages from the database
+            # Options are the chat IDs; labels, models and positions are looked up by ID
+            saved_chat_labels: dict[int, str] = {chat[0]: f"{chat[1]} ({chat[2]})" for chat in saved_chats}
+            saved_chat_models: dict[int, str] = {chat[0]: chat[2] for chat in saved_chats}
+            saved_chat_index: dict[int, int] = {chat[0]: i for i, chat in enumerate(saved_chats)}
+
+            # Preselect the chat currently loaded (if any) so picking it again does not reload it
+            chat_id: int | None = st.selectbox("Saved Chats",
+                                               options=list(saved_chat_labels),
+                                               format_func=saved_chat_labels.get,
+                                               index=saved_chat_index.get(st.session_state["chat_id"]),
+                                               placeholder="Load a saved chat",
+                                               label_visibility="collapsed")
+
+            # Let the user know when older chats may have been left out of the list
+            if config.STREAMLIT_OLLAMA_SAVED_CHATS_LIMIT and len(saved_chats) >= config.STREAMLIT_OLLAMA_SAVED_CHATS_LIMIT:
+                st.caption(f"Showing the {len(saved_chats)} most recent chats only.")
+
+            if chat_id is not None and chat_id != st.session_state["chat_id"]:
+                chat_model: str = saved_chat_models[chat_id]
+                # Load chat messages from the database
+                # Only the most recent page is loaded up front; older messages are loaded on demand in the chat area
+                if config.STREAMLIT_OLLAMA_CHAT_PAGE_SIZE:
+                    st.session_state["messages"], st.session_state["older_messages_before_id"] = chat_db.get_recent_messages(
+                        chat_id=chat_id, limit=config.STREAMLIT_OLLAMA_CHAT_PAGE_SIZE)
+                else:
                     st.session_state["messages"] = chat_db.get_chat_messages(chat_id=chat_id)
-                    st.session_state["selected_model"] = chat_model
-                    st.session_state["chat_id"] = chat_id
-                    st.rerun()
+                    st.session_state["older_messages_before_id"] = None
+                st.session_state["selected_model"] = chat_model
+                st.session_state["chat_id"] = chat_id
+                st.rerun()
 
 
 # Initialize chat messages in session state with a greeting (if configured)
@@ -174,47 +351,142 @@ if len(st.session_state["messages"]) == 0:
         st.session_state["messages"] = []
 
 
-# Write out the chat messages to the screen
-for msg in st.session_state["messages"]:
-    avatar = config.STREAMLIT_OLLAMA_ASSISTANT_AVATAR if msg["role"] == "assistant" else config.STREAMLIT_OLLAMA_USER_AVATAR
-    st.chat_message(msg["role"], width="stretch", avatar=avatar).write(msg["content"])
+def write_comparisons(comparisons: list[tuple[str, str | None]]) -> None:
+    """
+    Write out the comparison model responses of a turn, each captioned with its model.
 
+    :param comparisons: List of (model, response content) tuples; the content is None if the model failed.
+    """
+    for compare_model, compare_content in comparisons:
+        with st.chat_message("assistant", avatar=config.STREAMLIT_OLLAMA_ASSISTANT_AVATAR, width="stretch"):
+            st.caption(compare_model)
+            if compare_content is None:
+                st.error(f"Failed to get a response from {compare_model}.")
+            else:
+                st.markdown(compare_content)
 
-# Chat input box
-# The app will wait here for user input
-if prompt := st.chat_input(placeholder=st.session_state["selected_model"]):
-    st.session_state["messages"].append({"role": "user", "content": prompt})
-    st.chat_message("user", avatar=config.STREAMLIT_OLLAMA_USER_AVATAR, width="stretch").write(prompt)
 
-    # Save the user message to the database if chat is saved
-    if st.session_state["chat_id"]:
-        chat_db.save_chat_message(chat_id=st.session_state["chat_id"],
-                                  model=st.session_state["selected_model"],
-                                  role="user",
-                                  content=prompt)
-
-    # Call the Ollama API for a streaming chat response
-    # Show a "thinking" spinner while waiting for the response
-    with st.spinner("Thinking..."):
-        log.debug(f"Using model: {st.session_state["selected_model"]} for chat response.")
-        response_stream: ChatResponse = ollama.chat(model = st.session_state["selected_model"], 
-                                                    messages = st.session_state["messages"],
-                                                    stream=True,
-                                                    keep_alive=config.STREAMLIT_OLLAMA_CLIENT_KEEPALIVE)
-
-        # Within the chat message context, stream the response
-        with st.chat_message("assistant", avatar=config.STREAMLIT_OLLAMA_ASSISTANT_AVATAR, width="stretch"):
-            def response_streamer():
-                 """Generator function to stream response chunks."""
-                 for chunk in response_stream:
-                     yield chunk.message.content
-            
-            # Stream the response and capture the full content for the session state
-            # Save the full response to the database if chat is saved
-            full_response: str = st.write_stream(response_streamer)  # Dynamically update the assistant's message
-            st.session_state["messages"].append({"role": "assistant", "content": full_response})
-            if st.session_state["chat_id"]:
-                chat_db.save_chat_message(chat_id=st.session_state["chat_id"],
-                                          model=st.session_state["selected_model"],
-                                          role="assistant",
-                                          content=full_response)
+@st.fragment
+def chat_view() -> None:
+    """
+    The chat area: message history, chat input and model responses.
+    Runs as a fragment so submitting a prompt only reruns this area and not the sidebar.
+    """
+    # Load older messages button
+    # Shown only while a saved chat is partially loaded; prepends the next older page of messages
+    if st.session_state["chat_id"] and st.session_state["older_messages_before_id"]:
+        if st.button("Load older messages", width="stretch"):
+            older_messages, st.session_state["older_messages_before_id"] = chat_db.get_recent_messages(
+                chat_id=st.session_state["chat_id"],
+                limit=config.STREAMLIT_OLLAMA_CHAT_PAGE_SIZE,
+                before_id=st.session_state["older_messages_before_id"])
+            st.session_state["messages"][:0] = older_messages
+            st.rerun(scope="fragment")
+
+    # Write out the chat messages to the screen
+    # Completed messages are plain strings, so they go straight to markdown rather than through st.write's type dispatch
+    for msg in st.session_state["messages"]:
+        avatar = config.STREAMLIT_OLLAMA_ASSISTANT_AVATAR if msg["role"] == "assistant" else config.STREAMLIT_OLLAMA_USER_AVATAR
+        st.chat_message(msg["role"], width="stretch", avatar=avatar).markdown(msg["content"])
+
+    # Write out the comparison responses of the last turn once more if that turn ended with a full app rerun
+    if comparisons := st.session_state.pop("comparisons", None):
+        write_comparisons(comparisons)
+
+    # Chat input box
+    # The app will wait here for user input
+    # Whitespace-only prompts are ignored
+    if (prompt := st.chat_input(placeholder=st.session_state["selected_model"])) and prompt.strip():
+        messages_before_turn: int = len(st.session_state["messages"])
+        st.session_state["messages"].append({"role": "user", "content": prompt})
+        st.chat_message("user", avatar=config.STREAMLIT_OLLAMA_USER_AVATAR, width="stretch").write(prompt)
+
+        # Simple acknowledgements (e.g. "thanks") get the configured canned reply without a model round-trip
+        acknowledged: bool = bool(config.STREAMLIT_OLLAMA_ACK_RESPONSE) and utils.is_ack(prompt)
+
+        # Start the comparison models right away so they run while the main response streams
+        # These are not added to the chat history or saved to the database
+        compare_models: list[str] = [m for m in st.session_state.get("compare_models", []) if m != st.session_state["selected_model"]]
+        compare_future: Future | None = None
+        if compare_models and not acknowledged:
+            compare_future = _compare_executor().submit(parallel_chat, [{"model": m,
+                                                                         "messages": list(utils.context_window(st.session_state["messages"])),
+                                                                         "keep_alive": config.STREAMLIT_OLLAMA_CLIENT_KEEPALIVE} for m in compare_models])
+
+        full_response: str
+        if acknowledged:
+            full_response = config.STREAMLIT_OLLAMA_ACK_RESPONSE
+            st.chat_message("assistant", avatar=config.STREAMLIT_OLLAMA_ASSISTANT_AVATAR, width="stretch").markdown(full_response)
+        else:
+            # Call the Ollama API for a streaming chat response
+            # Show a "thinking" spinner while waiting for the response
+            with st.spinner("Thinking..."):
+                log.debug("Using model: %s for chat response.", st.session_state["selected_model"])
+
+                # Within the chat message context, stream the response
+                with st.chat_message("assistant", avatar=config.STREAMLIT_OLLAMA_ASSISTANT_AVATAR, width="stretch"):
+                    async def response_streamer():
+                        """
+                        Async generator function to stream response chunks.
+                        The async client is opened per response since st.write_stream drives it on its own event loop.
+                        Chunks are coalesced and flushed every STREAMLIT_OLLAMA_STREAM_FLUSH_MS (or every 8 chunks)
+                        so fast models do not force a re-render per token.
+                        """
+                        buffer: list[str] = []
+                        last_flush: float = time.monotonic()
+                        flush_interval: float = config.STREAMLIT_OLLAMA_STREAM_FLUSH_MS / 1000
+
+                        # AsyncClient is not an async context manager, so its HTTP connection pool is closed explicitly
+                        async_ollama = AsyncOllamaClient(host=config.STREAMLIT_OLLAMA_HOST, **utils.http_client_options())
+                        try:
+                            response_stream: AsyncIterator[ChatResponse] = await async_ollama.chat(model=st.session_state["selected_model"],
+                                                                                                   messages=utils.context_window(st.session_state["messages"]),
+                                                                                                   stream=True,
+                                                                                                   keep_alive=config.STREAMLIT_OLLAMA_CLIENT_KEEPALIVE)
+                            async for chunk in response_stream:
+                                buffer.append(chunk.message.content)
+                                if time.monotonic() - last_flush >= flush_interval or len(buffer) >= 8:
+                                    yield "".join(buffer)
+                                    buffer.clear()
+                                    last_flush = time.monotonic()
+                        finally:
+                            await async_ollama._client.aclose()
+
+                        # Flush whatever remains once the response is complete
+                        if buffer:
+                            yield "".join(buffer)
+
+                    # Stream the response and capture the full content for the session state
+                    full_response = st.write_stream(response_streamer)  # Dynamically update the assistant's message
+
+        # Save the user message and the full response to the database together if chat is saved
+        st.session_state["messages"].append({"role": "assistant", "content": full_response})
+        if st.session_state["chat_id"]:
+            chat_db.save_chat_messages(chat_id=st.session_state["chat_id"],
+                                       model=st.session_state["selected_model"],
+                                       rows=[("user", prompt), ("assistant", full_response)])
+
+        # Show the comparison responses once the slowest comparison model has finished
+        if compare_future is not None:
+            with st.spinner(f"Comparing with {len(compare_models)} model(s)..."):
+                compare_responses = compare_future.result()
+
+            comparisons: list[tuple[str, str | None]] = []
+            for compare_model, compare_response in zip(compare_models, compare_responses):
+                if isinstance(compare_response, BaseException):
+                    log.error("Failed to get a comparison response from model %s. Error: %s", compare_model, compare_response)
+                    comparisons.append((compare_model, None))
+                else:
+                    comparisons.append((compare_model, compare_response.message.content))
+            write_comparisons(comparisons)
+
+        # The sidebar's New/Save/Delete Chat buttons only change state within the first turn of a chat
+        # Rerun the full app in that case so the sidebar reflects it; otherwise only this fragment reruns
+        if messages_before_turn <= 1:
+            # Keep this turn's comparison responses so the rerun does not wipe them
+            if compare_future is not None:
+                st.session_state["comparisons"] = comparisons
+            st.rerun()
+
+
+chat_view()
@@ -8,6 +8,9 @@ configurations and will not accept custom configurations.
 # The default Ollama host URL. By default it is assumed to be running on localhost.
 STREAMLIT_OLLAMA_HOST: str = "http://localhost:11434"
 
+# How often (in seconds) the list of available models is refreshed from Ollama in the background
+STREAMLIT_OLLAMA_MODEL_REFRESH_SECONDS: int = 30
+
 # Page Layout configuration for Streamlit
 STREAMLIT_OLLAMA_PAGE_LAYOUT: str = "wide"  # Options: "centered", "wide"
 
@@ -25,6 +28,31 @@ STREAMLIT_OLLAMA_USER_AVATAR: str = "images/user-avatar.png"
 # If set to None or an empty string, no greeting will be shown
 STREAMLIT_OLLAMA_ASSISTANT_GREETING: str = "How can I help you?"
 
+# Canned reply for simple acknowledgements such as "ok", "thanks" or "hello"
+# If set, those prompts are answered with this text without calling the model; if None, every prompt goes to the model
+STREAMLIT_OLLAMA_ACK_RESPONSE: str | None = None
+
 # Additinal Ollama client configurations defaults
 # Keepalive: Model keep-alive duration (for example 5m or 0 to unload immediately)
 STREAMLIT_OLLAMA_CLIENT_KEEPALIVE: str = "30m"
+
+# HTTP/2: Multiplex Ollama requests over a single connection (requires the h2 package: pip install "httpx[http2]")
+# Only takes effect for https hosts, for example when Ollama is served behind a reverse proxy
+STREAMLIT_OLLAMA_CLIENT_HTTP2: bool = False
+
+# Streaming flush interval in milliseconds
+# Response chunks are buffered and written to the screen at most this often (0 writes every chunk)
+STREAMLIT_OLLAMA_STREAM_FLUSH_MS: int = 30
+
+# Saved chats: Maximum number of the most recently saved chats listed in the sidebar (for example 100)
+# Older chats are left out of the list; set to None or 0 to always list every saved chat
+STREAMLIT_OLLAMA_SAVED_CHATS_LIMIT: int | None = None
+
+# Saved chat page size: Number of most recent messages loaded when a saved chat is opened (for example 50)
+# Older messages are loaded on demand with the "Load older messages" button and are not sent to the model until loaded
+# None or 0 always loads the full chat history, so the model keeps seeing all of it
+STREAMLIT_OLLAMA_CHAT_PAGE_SIZE: int | None = None
+
+# Context window: Number of most recent turns (user + assistant message pairs) sent to the model with each prompt
+# Shorter context means less prompt processing per turn on long chats; set to None or 0 to always send the full history
+STREAMLIT_OLLAMA_CONTEXT_TURNS: int | None = None
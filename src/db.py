@@ -1,6 +1,7 @@
+import streamlit as st
 import utils
 
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlalchemy.exc import IntegrityError
 from streamlit.connections import SQLConnection
 
@@ -10,6 +11,68 @@ from streamlit.connections import SQLConnection
 log = utils.logger()
 
 
+# Prepared SQL statements
+# Built once at import so SQLAlchemy can reuse their compiled form on every call
+_SQL_INSERT_CHAT = text("INSERT INTO chats (name, model) VALUES (:name, :model) RETURNING id;")
+_SQL_INSERT_MESSAGE = text("INSERT INTO messages (chat_id, model, role, content) VALUES (:chat_id, :model, :role, :content);")
+_SQL_GET_MESSAGES = text("SELECT role, content FROM messages WHERE chat_id = :chat_id ORDER BY id ASC;")
+_SQL_GET_RECENT_MESSAGES = text("SELECT id, role, content FROM messages "
+                                "WHERE chat_id = :chat_id AND (:before_id IS NULL OR id < :before_id) "
+                                "ORDER BY id DESC LIMIT :limit;")
+_SQL_UPDATE_CHAT_MODEL = text("UPDATE chats SET model = :model WHERE id = :chat_id;")
+_SQL_DELETE_CHAT = text("DELETE FROM chats WHERE id = :chat_id;")
+_SQL_LIST_CHATS = text("SELECT id, name, model, timestamp FROM chats ORDER BY timestamp DESC;")
+_SQL_LIST_RECENT_CHATS = text("SELECT id, name, model, timestamp FROM chats ORDER BY timestamp DESC LIMIT :limit;")
+_SQL_OPTIMIZE = text("PRAGMA optimize;")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Apply SQLite PRAGMAs to a new DBAPI connection.
+    Registered as a 'connect' event listener so every pooled connection gets them, not just the first one.
+
+    :param dbapi_connection: The raw sqlite3 connection that was just opened.
+    :param connection_record: SQLAlchemy's pool record for the connection (unused).
+    :return: None
+    """
+    # Turn off the sqlite3 driver's implicit transaction handling; SQLAlchemy emits BEGIN itself (see _begin_sqlite_transaction)
+    dbapi_connection.isolation_level = None
+
+    cursor = dbapi_connection.cursor()
+    try:
+        # Enforce foreign keys so deleting a chat cascades to its messages on every connection
+        cursor.execute("PRAGMA foreign_keys = ON;")
+
+        # Performance settings are best effort; the app still works with SQLite's defaults
+        try:
+            # Write-ahead logging: commits append to the WAL instead of rewriting a rollback journal
+            journal_mode = cursor.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+            if journal_mode.lower() != "wal":
+                log.warning("Could not enable WAL journal mode for SQLite; using '%s'.", journal_mode)
+
+            # NORMAL is crash-safe under WAL and skips the fsync on every commit
+            cursor.execute("PRAGMA synchronous = NORMAL;")
+            cursor.execute("PRAGMA temp_store = MEMORY;")
+            cursor.execute("PRAGMA cache_size = -20000;")  # ~20MB page cache
+            cursor.execute("PRAGMA mmap_size = 268435456;")  # 256MB memory-mapped I/O
+        except Exception as e:
+            log.warning("Failed to apply SQLite performance PRAGMAs; using defaults. Error: %s", e)
+    finally:
+        cursor.close()
+
+
+def _begin_sqlite_transaction(connection) -> None:
+    """
+    Emit an explicit BEGIN whenever SQLAlchemy starts a transaction.
+    Registered as a 'begin' event listener, so transactions start and end exactly where the session's do,
+    instead of wherever the sqlite3 driver decides to open one implicitly.
+
+    :param connection: The SQLAlchemy Connection starting the transaction.
+    :return: None
+    """
+    connection.exec_driver_sql("BEGIN;")
+
+
 class ChatExistsError(Exception):
     """
     Raised when attempting to create a chat with a name that already exists.
@@ -31,9 +94,12 @@ class ChatDB:
         try:
             self.connection = connection
 
-            # Enable foreign key constraints for SQLite
-            with self.connection.session as db_session:
-                db_session.execute(text("PRAGMA foreign_keys = ON;"))
+            # Enable foreign key constraints and performance PRAGMAs on each connection as the pool opens it
+            # These are SQLite-specific, so other database backends are left untouched
+            engine = self.connection.engine
+            if engine.dialect.name == "sqlite" and not event.contains(engine, "connect", _apply_sqlite_pragmas):
+                event.listen(engine, "connect", _apply_sqlite_pragmas)
+                event.listen(engine, "begin", _begin_sqlite_transaction)
         
             # Initialize database tables if they do not exist
             # Create chats table for storing the high-level chat metadata
@@ -61,11 +127,26 @@ class ChatDB:
                     );
                 """
                 db_session.execute(text(create_messages_table_sql))
+
+                # Create indexes for the chat history lookups
+                # (chat_id, id) serves both the WHERE and the ORDER BY when loading a chat's messages
+                db_session.execute(text("CREATE INDEX IF NOT EXISTS idx_messages_chat_id ON messages (chat_id, id);"))
+                db_session.execute(text("CREATE INDEX IF NOT EXISTS idx_chats_timestamp ON chats (timestamp DESC);"))
                 db_session.commit()
         except Exception as e:
-            log.error(f"Failed to initialize DB connection. Error: {e}")
+            log.error("Failed to initialize DB connection. Error: %s", e)
             self.connection = None
     
+    @classmethod
+    def from_streamlit(cls, name: str) -> "ChatDB":
+        """
+        Create a ChatDB from a Streamlit SQL connection configured in secrets.toml.
+
+        :param name: Name of the connection (e.g. "streamlit_ollama_db" for [connections.streamlit_ollama_db]).
+        :return: A new ChatDB instance.
+        """
+        return cls(connection=st.connection(name=name, type="sql"))
+
     def save_chat(self, name: str, model: str, messages: list[dict]) -> int:
         """
         Save a chat conversation to the database.
@@ -78,64 +159,72 @@ class ChatDB:
         if self.connection is None:
             raise RuntimeError("DB connection not available")
 
-        with self.connection.session as db_session:
-            try:
-                # Insert chat metadata (unique constraint enforced by DB)
-                db_session.execute(
-                    text("INSERT INTO chats (name, model) VALUES (:name, :model);"),
-                    {"name": name, "model": model}
-                )
-                db_session.commit()
-
-                # Obtain new chat id
+        try:
+            # One transaction for the whole save; committed on exit, rolled back on any error
+            with self.connection.session as db_session, db_session.begin():
+                # Insert chat metadata (unique constraint enforced by DB) and obtain the new chat id
                 chat_id = db_session.execute(
-                    text("SELECT id FROM chats WHERE name = :name;"),
-                    {"name": name}
-                ).scalar()
+                    _SQL_INSERT_CHAT,
+                    {"name": name, "model": model}
+                ).scalar_one()
 
-                # Insert messages
-                for msg in messages:
+                # Insert messages in a single executemany within the same transaction
+                if messages:
                     db_session.execute(
-                        text("INSERT INTO messages (chat_id, model, role, content) VALUES (:chat_id, :model, :role, :content);"),
-                        {"chat_id": chat_id, "model": model, "role": msg["role"], "content": msg["content"]}
+                        _SQL_INSERT_MESSAGE,
+                        [{"chat_id": chat_id, "model": model, "role": msg["role"], "content": msg["content"]} for msg in messages]
                     )
+            self._optimize()
+            return chat_id
+
+        except IntegrityError as ie:
+            # re-raise a clearer, domain-specific error
+            raise ChatExistsError("Chat with this name already exists.") from ie
+        except Exception:
+            log.exception("Unexpected error saving chat")
+            raise
+
+    def _optimize(self) -> None:
+        """
+        Let SQLite refresh its query planner statistics (e.g. for the message and chat indexes) if they are stale.
+        PRAGMA optimize only runs ANALYZE on tables that need it, so this is close to free when nothing changed.
+        Best effort: failures are logged and otherwise ignored.
+
+        :return: None
+        """
+        if self.connection.engine.dialect.name != "sqlite":
+            return
+
+        try:
+            with self.connection.session as db_session:
+                db_session.execute(_SQL_OPTIMIZE)
                 db_session.commit()
-                return chat_id
-
-            except IntegrityError as ie:
-                db_session.rollback()
-                # re-raise a clearer, domain-specific error
-                raise ChatExistsError("Chat with this name already exists.") from ie
-            except Exception:
-                db_session.rollback()
-                log.exception("Unexpected error saving chat")
-                raise
-
-    def save_chat_message(self, chat_id: int, model:str, role: str, content: str) -> None:
+        except Exception as e:
+            log.warning("Failed to optimize the SQLite database. Error: %s", e)
+
+    def save_chat_messages(self, chat_id: int, model: str, rows: list[tuple[str, str]]) -> None:
         """
-        Add a message to a specific chat.
+        Add several messages to a specific chat in a single transaction.
 
-        :param chat_id: ID of the chat to add the message to.
+        :param chat_id: ID of the chat to add the messages to.
         :param model: Model used for the chat.
-        :param role: Role of the message sender (e.g., 'user', 'assistant').
-        :param content: Content of the message.
+        :param rows: List of (role, content) tuples in the order they should be saved.
         :return: None
         """
         if self.connection is None:
-            log.error("No database connection available. Cannot add message.")
+            log.error("No database connection available. Cannot add messages.")
             return
 
         try:
             with self.connection.session as db_session:
-                insert_message_query = "INSERT INTO messages (chat_id, model, role, content) VALUES (:chat_id, :model, :role, :content);"
                 db_session.execute(
-                    text(insert_message_query), 
-                    {"chat_id": chat_id, "model": model, "role": role, "content": content}
+                    _SQL_INSERT_MESSAGE,
+                    [{"chat_id": chat_id, "model": model, "role": role, "content": content} for role, content in rows]
                 )
                 db_session.commit()
-                log.info(f"Added message to chat ID {chat_id} in database.")
+                log.debug("Added %s messages to chat ID %s in database.", len(rows), chat_id)
         except Exception as e:
-            log.error(f"Failed to add message to chat ID {chat_id} in database. Error: {e}")
+            log.error("Failed to add messages to chat ID %s in database. Error: %s", chat_id, e)
 
     def get_chat_messages(self, chat_id: int) -> list[dict]:
         """
@@ -150,18 +239,42 @@ class ChatDB:
 
         try:
             with self.connection.session as db_session:
-                get_messages_sql = "SELECT role, content FROM messages WHERE chat_id = :chat_id ORDER BY id ASC;"
-                result = db_session.execute(
-                    text(get_messages_sql), 
-                    {"chat_id": chat_id}
-                )
-                messages = [{"role": row[0], "content": row[1]} for row in result.fetchall()]
-                log.info(f"Retrieved messages for chat ID {chat_id} from database.")
+                result = db_session.execute(_SQL_GET_MESSAGES, {"chat_id": chat_id})
+                messages = [{"role": role, "content": content} for role, content in result]
+                log.debug("Retrieved messages for chat ID %s from database.", chat_id)
                 return messages
         except Exception as e:
-            log.error(f"Failed to retrieve messages for chat ID {chat_id} from database. Error: {e}")
+            log.error("Failed to retrieve messages for chat ID %s from database. Error: %s", chat_id, e)
             return []
 
+    def get_recent_messages(self, chat_id: int, limit: int = 50, before_id: int | None = None) -> tuple[list[dict], int | None]:
+        """
+        Retrieve the most recent messages for a specific chat ID, one page at a time.
+        Pass the returned ID back as before_id to retrieve the page of messages before it.
+
+        :param chat_id: ID of the chat to retrieve messages for.
+        :param limit: Maximum number of messages to retrieve.
+        :param before_id: Only retrieve messages older than this message ID (None for the most recent messages).
+        :return: Tuple of the message dicts with 'role' and 'content' (oldest first),
+                 and the before_id for the next older page (None if there are no older messages).
+        """
+        if self.connection is None:
+            log.error("No database connection available. Cannot retrieve messages.")
+            return [], None
+
+        try:
+            with self.connection.session as db_session:
+                # One extra row is fetched to tell whether there are older messages left
+                result = db_session.execute(_SQL_GET_RECENT_MESSAGES, {"chat_id": chat_id, "before_id": before_id, "limit": limit + 1})
+                rows = result.fetchall()
+                next_before_id: int | None = rows[limit - 1][0] if len(rows) > limit else None
+                messages = [{"role": role, "content": content} for _, role, content in reversed(rows[:limit])]
+                log.debug("Retrieved %s recent messages for chat ID %s from database.", len(messages), chat_id)
+                return messages, next_before_id
+        except Exception as e:
+            log.error("Failed to retrieve recent messages for chat ID %s from database. Error: %s", chat_id, e)
+            return [], None
+
     def update_chat_model(self, chat_id: int, model: str) -> None:
         """
         Update the model used for a specific chat.
@@ -176,15 +289,14 @@ class ChatDB:
 
         try:
             with self.connection.session as db_session:
-                update_model_sql = "UPDATE chats SET model = :model WHERE id = :chat_id;"
                 db_session.execute(
-                    text(update_model_sql), 
+                    _SQL_UPDATE_CHAT_MODEL,
                     {"model": model, "chat_id": chat_id}
                 )
                 db_session.commit()
-                log.info(f"Updated model for chat ID {chat_id} to '{model}' in database.")
+                log.info("Updated model for chat ID %s to '%s' in database.", chat_id, model)
         except Exception as e:
-            log.error(f"Failed to update model for chat ID {chat_id} in database. Error: {e}")
+            log.error("Failed to update model for chat ID %s in database. Error: %s", chat_id, e)
 
     def delete_chat(self, chat_id: int) -> None:
         """
@@ -199,20 +311,20 @@ class ChatDB:
 
         try:
             with self.connection.session as db_session:
-                delete_chat_sql = "DELETE FROM chats WHERE id = :chat_id;"
                 db_session.execute(
-                    text(delete_chat_sql), 
+                    _SQL_DELETE_CHAT,
                     {"chat_id": chat_id}
                 )
                 db_session.commit()
-                log.info(f"Deleted chat ID {chat_id} and its messages from database.")
+                log.info("Deleted chat ID %s and its messages from database.", chat_id)
         except Exception as e:
-            log.error(f"Failed to delete chat ID {chat_id} from database. Error: {e}")
+            log.error("Failed to delete chat ID %s from database. Error: %s", chat_id, e)
 
-    def list_chats(self) -> list[tuple]:
+    def list_chats(self, limit: int | None = None) -> list[tuple]:
         """
-        List saved chats from the SQLite database.
+        List saved chats from the SQLite database, newest first.
 
+        :param limit: Maximum number of the most recent chats to list; None or 0 lists all chats.
         :return: List of tuples with chat metadata (id, name, model, timestamp).
         """
         if self.connection is None:
@@ -221,36 +333,14 @@ class ChatDB:
 
         try:
             with self.connection.session as db_session:
-                list_chats_sql = "SELECT id, name, model, timestamp FROM chats ORDER BY timestamp DESC;"
-                result = db_session.execute(text(list_chats_sql))
-                chats = result.fetchall()
+                if limit:
+                    result = db_session.execute(_SQL_LIST_RECENT_CHATS, {"limit": limit})
+                else:
+                    result = db_session.execute(_SQL_LIST_CHATS)
+                # Plain tuples rather than Row objects, so the list pickles cheaply into Streamlit's data cache
+                chats = [tuple(row) for row in result]
                 log.info("Fetched saved chats from database.")
                 return chats
         except Exception as e:
-            log.error(f"Failed to fetch saved chats from database. Error: {e}")
+            log.error("Failed to fetch saved chats from database. Error: %s", e)
             return []
-    
-    def last_used_model(self) -> str | None:
-        """
-        Retrieve the last used model from saved chats.
-
-        :return: The last used model name, or None if no chats exist.
-        """
-        if self.connection is None:
-            log.error("No database connection available. Cannot retrieve last used model.")
-            return None
-
-        try:
-            with self.connection.session as db_session:
-                last_model_sql = "SELECT model FROM chats ORDER BY timestamp DESC LIMIT 1;"
-                result = db_session.execute(text(last_model_sql))
-                row = result.fetchone()
-                if row:
-                    log.info("Retrieved last used model from database.")
-                    return row[0]
-                else:
-                    log.info("No saved chats found to retrieve last used model.")
-                    return None
-        except Exception as e:
-            log.error(f"Failed to retrieve last used model from database. Error: {e}")
-            return None
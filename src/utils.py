@@ -1,17 +1,33 @@
+import httpx
 import logging
+import re
 
-from config import STREAMLIT_OLLAMA_LOG_FORMAT, STREAMLIT_OLLAMA_LOG_LEVEL
+from types import SimpleNamespace
+
+from config import STREAMLIT_OLLAMA_CLIENT_HTTP2, STREAMLIT_OLLAMA_CONTEXT_TURNS, STREAMLIT_OLLAMA_LOG_FORMAT, STREAMLIT_OLLAMA_LOG_LEVEL
+
+
+# Prompts that are only a short acknowledgement or greeting (see is_ack)
+_ACK_PATTERN: re.Pattern = re.compile(r"^\s*(ok|okay|thanks|thank you|thx|hi|hello)\W*$", re.IGNORECASE)
+
+# Set once the app logger has been configured, so later logger() calls skip dictConfig
+_logger_configured: bool = False
 
 
 def logger(level: str = STREAMLIT_OLLAMA_LOG_LEVEL, 
            format: str = STREAMLIT_OLLAMA_LOG_FORMAT) -> logging.Logger:
     """
     Setup and return a logger with the specified level and format.
+    The logging configuration is only applied on the first call; later calls return the same logger.
 
     :param level: The logging level as supported by Streamlit (e.g., "DEBUG", "INFO").
     :param format: The logging format string as supported by Streamlit.
     :return: Configured logger instance.
     """
+    global _logger_configured
+
+    if _logger_configured:
+        return logging.getLogger("streamlit-ollama")
 
     from logging.config import dictConfig
 
@@ -40,5 +56,74 @@ def logger(level: str = STREAMLIT_OLLAMA_LOG_LEVEL,
             }
         }
     })
+    _logger_configured = True
 
     return logging.getLogger("streamlit-ollama")
+
+
+def use_orjson() -> bool:
+    """
+    Swap the JSON decoder used by the ollama client for orjson, if it is installed.
+    Every streamed response chunk is decoded individually, so a faster decoder lowers the per-token CPU cost.
+
+    :return: True if orjson is now in use, False if it is not installed.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return False
+
+    from ollama import _client
+
+    _client.json = SimpleNamespace(loads=orjson.loads, 
+                                   dumps=lambda obj, **kwargs: orjson.dumps(obj).decode())
+    return True
+
+
+def http_client_options(http2: bool = STREAMLIT_OLLAMA_CLIENT_HTTP2) -> dict:
+    """
+    Build the httpx client options passed through the ollama Client/AsyncClient constructors.
+    Keeps a larger pool of keep-alive connections and enables HTTP/2 when requested and available.
+
+    :param http2: Whether to enable HTTP/2 (requires the h2 package).
+    :return: Keyword arguments for the ollama Client/AsyncClient constructors.
+    """
+    options: dict = {"limits": httpx.Limits(max_keepalive_connections=32)}
+
+    if http2:
+        try:
+            import h2  # noqa: F401
+            options["http2"] = True
+        except ImportError:
+            logging.getLogger("streamlit-ollama").warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1.")
+
+    return options
+
+
+def context_window(messages: list[dict], turns: int | None = STREAMLIT_OLLAMA_CONTEXT_TURNS) -> list[dict]:
+    """
+    Trim a chat history to the most recent turns before sending it to the model.
+    The newest message is the pending user prompt, so it is kept in addition to the complete turns before it.
+    A leading system message is always kept.
+
+    :param messages: List of message dicts with 'role' and 'content', ending with the pending user prompt.
+    :param turns: Number of recent turns (user + assistant pairs) to keep; None or 0 keeps the full history.
+    :return: The trimmed list of message dicts.
+    """
+    if not turns or len(messages) <= turns * 2 + 1:
+        return messages
+
+    recent_messages: list[dict] = messages[-(turns * 2 + 1):]
+    if messages[0]["role"] == "system":
+        return [messages[0]] + recent_messages
+    return recent_messages
+
+
+def is_ack(prompt: str) -> bool:
+    """
+    Check whether a prompt is only a short acknowledgement or greeting (e.g. "ok", "thanks!", "Hello").
+
+    :param prompt: The user's prompt.
+    :return: True if the prompt is an acknowledgement.
+    """
+    return _ACK_PATTERN.match(prompt) is not None